@@ -1,8 +1,11 @@
 import keyword
+import os
 import re
+from typing import Optional
 
 
 _use_orjson: bool = False
+_validate_syntax: Optional[bool] = None
 _symbol_ascii_strip_re = re.compile(r"[^A-Za-z0-9_]")
 
 
@@ -24,6 +27,28 @@ def get_use_orjson() -> bool:
     return _use_orjson
 
 
+def set_validate_syntax(value: Optional[bool]) -> None:
+    """
+    Set the value of the global variable _validate_syntax.
+    :param value: value of the variable, None to read it from the environment
+    """
+    global _validate_syntax
+    _validate_syntax = value
+
+
+def get_validate_syntax() -> bool:
+    """
+    Get the value of the global variable _validate_syntax. Unless it was set
+    explicitly, it is True only if the environment variable OPENAPI_GEN_VALIDATE
+    is set to 1.
+    :return: value of the variable
+    """
+    if _validate_syntax is not None:
+        return _validate_syntax
+
+    return os.environ.get("OPENAPI_GEN_VALIDATE") == "1"
+
+
 def normalize_symbol(symbol: str) -> str:
     """
     Remove invalid characters & keywords in Python symbol names
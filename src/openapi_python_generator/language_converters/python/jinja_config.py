@@ -1,6 +1,9 @@
 from pathlib import Path
+from typing import Optional
 
+from jinja2 import BytecodeCache
 from jinja2 import Environment
+from jinja2 import FileSystemBytecodeCache
 from jinja2 import FileSystemLoader
 
 
@@ -11,6 +14,21 @@ HTTPX_TEMPLATE = "httpx.jinja2"
 API_CONFIG_TEMPLATE = "apiconfig.jinja2"
 TEMPLATE_PATH = Path(__file__).parent / "templates"
 
+
+def _bytecode_cache() -> Optional[BytecodeCache]:
+    """
+    Creates a bytecode cache in jinja's per-user temp directory, so compiled templates
+    are reused across runs. Returns None if no safe directory is available.
+    """
+    try:
+        return FileSystemBytecodeCache(pattern="__openapi_python_generator_%s.cache")
+    except (OSError, RuntimeError):  # pragma: no cover
+        return None
+
+
 JINJA_ENV = Environment(
-    loader=FileSystemLoader(TEMPLATE_PATH), autoescape=True, trim_blocks=True
+    loader=FileSystemLoader(TEMPLATE_PATH),
+    autoescape=True,
+    trim_blocks=True,
+    bytecode_cache=_bytecode_cache(),
 )
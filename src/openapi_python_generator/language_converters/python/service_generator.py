@@ -1,12 +1,17 @@
+import ast
 import re
+from collections import defaultdict
+from typing import DefaultDict
 from typing import Dict
 from typing import List
 from typing import Literal
 from typing import Optional
 from typing import Tuple
 from typing import Union
+from typing import cast
 
 import click
+from jinja2 import Template
 from openapi_schema_pydantic import MediaType
 from openapi_schema_pydantic import Operation
 from openapi_schema_pydantic import Parameter
@@ -29,7 +34,49 @@ from openapi_python_generator.models import ServiceOperation
 from openapi_python_generator.models import TypeConversion
 
 
-HTTP_OPERATIONS = ["get", "post", "put", "delete", "options", "head", "patch", "trace"]
+HTTP_OPERATIONS = ("get", "post", "put", "delete", "options", "head", "patch", "trace")
+
+TypeCache = Dict[Tuple[int, bool], TypeConversion]
+# (operation, path name, http operation, operation id, tag, async)
+ServiceTask = Tuple[Operation, str, str, str, Optional[str], bool]
+
+_ref_name_cache: Dict[str, str] = {}
+_ref_type_conversion_cache: Dict[str, TypeConversion] = {}
+
+
+def _ref_name(ref: str) -> str:
+    """
+    Returns the last segment of a reference, e.g. TestModel for
+    #/components/schemas/TestModel.
+    :param ref: Reference string
+    :return: Name of the referenced object
+    """
+    name = _ref_name_cache.get(ref)
+    if name is None:
+        name = _ref_name_cache[ref] = ref.rpartition("/")[2]
+    return name
+
+
+def _convert_type(
+    schema: Schema, required: bool, type_cache: Optional[TypeCache] = None
+) -> TypeConversion:
+    """
+    Calls type_converter, reusing earlier results for the same schema object.
+    Schemas are keyed by identity, so the cache must not outlive the spec it was
+    filled from.
+    :param schema: Schema to be converted
+    :param required: Flag indicating if the type is required
+    :param type_cache: Cache of earlier conversions, None disables caching
+    :return: The converted type
+    """
+    if type_cache is None:
+        return type_converter(schema, required)
+
+    key = (id(schema), bool(required))
+    result = type_cache.get(key)
+    if result is None:
+        result = type_cache[key] = type_converter(schema, required)
+    return result
 
 
 def generate_body_param(operation: Operation) -> Union[str, None]:
@@ -68,18 +115,37 @@ def generate_body_param(operation: Operation) -> Union[str, None]:
             )  # pragma: no cover
 
 
-def generate_params(operation: Operation) -> str:
+def _param_entry(name: str, name_cleaned: str) -> str:
+    return f"{name!r} : {name_cleaned}"
+
+
+def _partition_params(
+    operation: Operation, type_cache: Optional[TypeCache] = None
+) -> Tuple[str, List[str], List[str]]:
+    """
+    Generates the signature, query params and header params of an operation in a
+    single pass over its parameters.
+    :param operation: Operation to generate the params for
+    :param type_cache: Cache of earlier type conversions
+    :return: Tuple of signature params, query params and header params
+    """
+
     def _generate_params_from_content(content: Union[Reference, Schema]):
-        if isinstance(content, Reference):
-            return f"data : {content.ref.split('/')[-1]}"
+        # Only references have a ref, which is cheaper to probe than isinstance.
+        ref = getattr(content, "ref", None)
+        if ref is not None:
+            return f"data : {_ref_name(ref)}"
         else:
-            return f"data : {type_converter(content, True).converted_type}"
+            schema = cast(Schema, content)
+            return f"data : {_convert_type(schema, True, type_cache).converted_type}"
 
     if operation.parameters is None and operation.requestBody is None:
-        return ""
+        return "", [], []
 
     params = ""
     default_params = ""
+    query_params = []
+    header_params = []
     if operation.parameters is not None:
         for param in operation.parameters:
             if not isinstance(param, Parameter):
@@ -87,23 +153,24 @@ def generate_params(operation: Operation) -> str:
             converted_result = ""
             required = False
             param_name_cleaned = common.normalize_symbol(param.name)
+            param_schema = param.param_schema
 
-            if isinstance(param.param_schema, Schema):
-                converted_result = (
-                    f"{param_name_cleaned} : {type_converter(param.param_schema, param.required).converted_type}"
-                    + ("" if param.required else " = None")
-                )
+            if param.param_in == "query":
+                query_params.append(_param_entry(param.name, param_name_cleaned))
+            elif param.param_in == "header":
+                header_params.append(_param_entry(param.name, param_name_cleaned))
+
+            if param_schema is not None:
                 required = param.required
-            elif isinstance(param.param_schema, Reference):
-                converted_result = (
-                    f"{param_name_cleaned} : {param.param_schema.ref.split('/')[-1] }"
-                    + (
-                        ""
-                        if isinstance(param, Reference) or param.required
-                        else " = None"
-                    )
-                )
-                required = isinstance(param, Reference) or param.required
+                ref = getattr(param_schema, "ref", None)
+                if ref is not None:
+                    type_str = _ref_name(ref)
+                else:
+                    type_str = _convert_type(
+                        cast(Schema, param_schema), required, type_cache
+                    ).converted_type
+                default = "" if required else " = None"
+                converted_result = f"{param_name_cleaned} : {type_str}{default}"
 
             if required:
                 params += f"{converted_result}, "
@@ -152,7 +219,13 @@ def generate_params(operation: Operation) -> str:
     params = params.replace("-", "_")
     default_params = default_params.replace("-", "_")
 
-    return params + default_params
+    return params + default_params, query_params, header_params
+
+
+def generate_params(
+    operation: Operation, type_cache: Optional[TypeCache] = None
+) -> str:
+    return _partition_params(operation, type_cache)[0]
 
 
 def generate_operation_id(
@@ -170,7 +243,7 @@ def generate_operation_id(
 
 def _generate_params(
     operation: Operation, param_in: Literal["query", "header"] = "query"
-):
+) -> List[str]:
     if operation.parameters is None:
         return []
 
@@ -178,7 +251,7 @@ def _generate_params(
     for param in operation.parameters:
         if isinstance(param, Parameter) and param.param_in == param_in:
             param_name_cleaned = common.normalize_symbol(param.name)
-            params.append(f"{param.name!r} : {param_name_cleaned}")
+            params.append(_param_entry(param.name, param_name_cleaned))
 
     return params
 
@@ -191,19 +264,22 @@ def generate_header_params(operation: Operation) -> List[str]:
     return _generate_params(operation, "header")
 
 
-def generate_return_type(operation: Operation) -> OpReturnType:
+def generate_return_type(
+    operation: Operation, type_cache: Optional[TypeCache] = None
+) -> OpReturnType:
     if operation.responses is None:
         return OpReturnType(type=None, status_code=200, complex_type=False)
 
-    good_responses: List[Tuple[int, Union[Response, Reference]]] = [
-        (int(status_code), response)
-        for status_code, response in operation.responses.items()
-        if status_code.startswith("2")
-    ]
-    if len(good_responses) == 0:
+    good_response: Optional[Tuple[int, Union[Response, Reference]]] = None
+    for status_code, response in operation.responses.items():
+        if status_code.startswith("2"):
+            good_response = (int(status_code), response)
+            break
+
+    if good_response is None:
         return OpReturnType(type=None, status_code=200, complex_type=False)
 
-    chosen_response = good_responses[0][1]
+    status, chosen_response = good_response
 
     if isinstance(chosen_response, Response) and chosen_response.content is not None:
         media_type_schema = chosen_response.content.get("application/json")
@@ -212,24 +288,27 @@ def generate_return_type(operation: Operation) -> OpReturnType:
             media_type_schema=chosen_response
         )  # pragma: no cover
     else:
-        return OpReturnType(
-            type=None, status_code=good_responses[0][0], complex_type=False
-        )
+        return OpReturnType(type=None, status_code=status, complex_type=False)
 
     if isinstance(media_type_schema, MediaType):
-        if isinstance(media_type_schema.media_type_schema, Reference):
-            type_conv = TypeConversion(
-                original_type=media_type_schema.media_type_schema.ref,
-                converted_type=media_type_schema.media_type_schema.ref.split("/")[-1],
-                import_types=[media_type_schema.media_type_schema.ref.split("/")[-1]],
-            )
+        schema = media_type_schema.media_type_schema
+        ref = getattr(schema, "ref", None)
+        if ref is not None:
+            type_conv = _ref_type_conversion_cache.get(ref)
+            if type_conv is None:
+                name = _ref_name(ref)
+                type_conv = _ref_type_conversion_cache[ref] = TypeConversion(
+                    original_type=ref,
+                    converted_type=name,
+                    import_types=[name],
+                )
             return OpReturnType(
                 type=type_conv,
-                status_code=good_responses[0][0],
+                status_code=status,
                 complex_type=True,
             )
-        elif isinstance(media_type_schema.media_type_schema, Schema):
-            converted_result = type_converter(media_type_schema.media_type_schema, True)
+        elif schema is not None:
+            converted_result = _convert_type(cast(Schema, schema), True, type_cache)
             if "array" in converted_result.original_type and isinstance(
                 converted_result.import_types, list
             ):
@@ -244,7 +323,7 @@ def generate_return_type(operation: Operation) -> OpReturnType:
                 list_type = None
             return OpReturnType(
                 type=converted_result,
-                status_code=good_responses[0][0],
+                status_code=status,
                 complex_type=converted_result.import_types is not None
                 and len(converted_result.import_types) > 0,
                 list_type=list_type,
@@ -254,13 +333,66 @@ def generate_return_type(operation: Operation) -> OpReturnType:
     elif media_type_schema is None:
         return OpReturnType(
             type=None,
-            status_code=good_responses[0][0],
+            status_code=status,
             complex_type=False,
         )
     else:
         raise Exception("Unknown media type schema type")  # pragma: no cover
 
 
+def generate_service_operation(
+    op: Operation,
+    path_name: str,
+    http_operation: str,
+    operation_id: str,
+    tag: Optional[str],
+    async_type: bool,
+    template: Template,
+    type_cache: Optional[TypeCache] = None,
+) -> ServiceOperation:
+    params, query_params, header_params = _partition_params(op, type_cache)
+    return_type = generate_return_type(op, type_cache)
+    body_param = generate_body_param(op)
+
+    so = ServiceOperation(
+        params=params,
+        operation_id=operation_id,
+        query_params=query_params,
+        header_params=header_params,
+        return_type=return_type,
+        content="",
+        async_client=async_type,
+        tag=tag,
+        body_param=body_param,
+        path_name=path_name,
+        method=http_operation,
+        use_orjson=common.get_use_orjson(),
+    )
+
+    # Only pass what the templates reference instead of serializing so.dict().
+    context = {
+        "params": so.params,
+        "operation_id": so.operation_id,
+        "query_params": so.query_params,
+        "header_params": so.header_params,
+        "return_type": so.return_type,
+        "async_client": so.async_client,
+        "body_param": so.body_param,
+        "path_name": so.path_name,
+        "method": so.method,
+        "use_orjson": so.use_orjson,
+    }
+    so.content = template.render(context)
+
+    if common.get_validate_syntax():
+        try:
+            ast.parse(so.content)
+        except SyntaxError as e:
+            click.echo(f"Error in service {so.operation_id}: {e}")
+
+    return so
+
+
 def generate_services(
     paths: Dict[str, PathItem], library_config: LibraryConfig
 ) -> List[Service]:
@@ -269,103 +401,63 @@ def generate_services(
     :param paths: paths object to be converted
     :return: List of services
     """
+    include_sync = library_config.include_sync
+    include_async = library_config.include_async
 
-    def generate_service_operation(
-        op: Operation, path_name: str, async_type: bool
-    ) -> ServiceOperation:
-        params = generate_params(op)
-        operation_id = generate_operation_id(op, http_operation, path_name)
-        query_params = generate_query_params(op)
-        header_params = generate_header_params(op)
-        return_type = generate_return_type(op)
-        body_param = generate_body_param(op)
-
-        so = ServiceOperation(
-            params=params,
-            operation_id=operation_id,
-            query_params=query_params,
-            header_params=header_params,
-            return_type=return_type,
-            operation=op,
-            pathItem=path,
-            content="",
-            async_client=async_type,
-            body_param=body_param,
-            path_name=path_name,
-            method=http_operation,
-            use_orjson=common.get_use_orjson(),
-        )
-
-        so.content = JINJA_ENV.get_template(library_config.template_name).render(
-            **so.dict()
-        )
-
-        if op.tags is not None and len(op.tags) > 0:
-            so.tag = normalize_symbol(op.tags[0])
-
-        try:
-            compile(so.content, "<string>", "exec")
-        except SyntaxError as e:  # pragma: no cover
-            click.echo(f"Error in service {so.operation_id}: {e}")  # pragma: no cover
-
-        return so
-
-    services = []
-    service_ops = []
+    tasks: List[ServiceTask] = []
     for path_name, path in paths.items():
+        # Only look at operations present in the spec, in HTTP_OPERATIONS order.
+        fields_set = path.__fields_set__
         for http_operation in HTTP_OPERATIONS:
-            op = path.__getattribute__(http_operation)
+            if http_operation not in fields_set:
+                continue
+
+            op = getattr(path, http_operation)
             if op is None:
                 continue
 
-            if library_config.include_sync:
-                sync_so = generate_service_operation(op, path_name, False)
-                service_ops.append(sync_so)
+            # Shared by the sync and async variant of the operation. Untagged
+            # operations end up in the "None" service.
+            operation_id = generate_operation_id(op, http_operation, path_name)
+            tag = normalize_symbol(op.tags[0]) if op.tags else None
 
-            if library_config.include_async:
-                async_so = generate_service_operation(op, path_name, True)
-                service_ops.append(async_so)
+            if include_sync:
+                tasks.append((op, path_name, http_operation, operation_id, tag, False))
 
-    tags = set([so.tag for so in service_ops])
+            if include_async:
+                tasks.append((op, path_name, http_operation, operation_id, tag, True))
 
-    for tag in tags:
-        services.append(
-            Service(
-                file_name=f"{tag}_service",
-                operations=[
-                    so for so in service_ops if so.tag == tag and not so.async_client
-                ],
-                content="\n".join(
-                    [
-                        so.content
-                        for so in service_ops
-                        if so.tag == tag and not so.async_client
-                    ]
-                ),
-                async_client=False,
-                library_import=library_config.library_name,
-                use_orjson=common.get_use_orjson(),
-            )
-        )
+    template = JINJA_ENV.get_template(library_config.template_name)
+    type_cache: TypeCache = {}
+    service_ops = [
+        generate_service_operation(*task, template, type_cache) for task in tasks
+    ]
 
-    for tag in tags:
-        services.append(
+    # Group the operations by tag into (sync, async) lists in a single pass.
+    groups: DefaultDict[
+        Optional[str], Tuple[List[ServiceOperation], List[ServiceOperation]]
+    ] = defaultdict(lambda: ([], []))
+    for so in service_ops:
+        groups[so.tag][1 if so.async_client else 0].append(so)
+
+    use_orjson = common.get_use_orjson()
+    services: List[Service] = []
+    # (enabled, async, file name prefix, slot in the groups tuple)
+    flavours = ((include_sync, False, "", 0), (include_async, True, "async_", 1))
+    for enabled, async_client, prefix, index in flavours:
+        if not enabled:
+            continue
+
+        services.extend(
             Service(
-                file_name=f"async_{tag}_service",
-                operations=[
-                    so for so in service_ops if so.tag == tag and so.async_client
-                ],
-                content="\n".join(
-                    [
-                        so.content
-                        for so in service_ops
-                        if so.tag == tag and so.async_client
-                    ]
-                ),
-                async_client=True,
+                file_name=f"{prefix}{tag}_service",
+                operations=ops[index],
+                content="\n".join(so.content for so in ops[index]),
+                async_client=async_client,
                 library_import=library_config.library_name,
-                use_orjson=common.get_use_orjson(),
+                use_orjson=use_orjson,
             )
+            for tag, ops in groups.items()
         )
 
     return services
@@ -1,8 +1,6 @@
 from typing import List
 from typing import Optional
 
-from openapi_schema_pydantic import Operation
-from openapi_schema_pydantic import PathItem
 from openapi_schema_pydantic import Schema
 from pydantic import BaseModel
 
@@ -34,8 +32,6 @@ class ServiceOperation(BaseModel):
     query_params: List[str]
     header_params: List[str]
     return_type: OpReturnType
-    operation: Operation
-    pathItem: PathItem
     content: str
     async_client: Optional[bool] = False
     tag: Optional[str] = None
@@ -86,3 +86,17 @@ def test_write_data(model_data_with_cleanup):
     assert (test_result_path / "models" / "__init__.py").is_file()
     assert (test_result_path / "__init__.py").exists()
     assert (test_result_path / "__init__.py").is_file()
+
+
+def test_write_data_skips_empty_services(model_data_with_cleanup):
+    result = generator(model_data_with_cleanup, library_config_dict[HTTPLibrary.httpx])
+    empty_service = result.services[0].copy(
+        update={"file_name": "empty_service", "operations": [], "content": ""}
+    )
+    result.services.append(empty_service)
+    write_data(result, test_result_path)
+
+    assert (test_result_path / "services").is_dir()
+    assert not (test_result_path / "services" / "empty_service.py").exists()
+
+    shutil.rmtree(test_result_path)
@@ -1,7 +1,10 @@
+from types import SimpleNamespace
+
 import pytest
 from openapi_schema_pydantic import MediaType
 from openapi_schema_pydantic import Operation
 from openapi_schema_pydantic import Parameter
+from openapi_schema_pydantic import PathItem
 from openapi_schema_pydantic import Reference
 from openapi_schema_pydantic import RequestBody
 from openapi_schema_pydantic import Response
@@ -9,9 +12,14 @@ from openapi_schema_pydantic import Schema
 
 from openapi_python_generator.common import HTTPLibrary
 from openapi_python_generator.common import library_config_dict
+from openapi_python_generator.language_converters.python import common
+from openapi_python_generator.language_converters.python import service_generator
 from openapi_python_generator.language_converters.python.service_generator import (
     generate_body_param,
 )
+from openapi_python_generator.language_converters.python.service_generator import (
+    generate_header_params,
+)
 from openapi_python_generator.language_converters.python.service_generator import (
     generate_operation_id,
 )
@@ -334,6 +342,55 @@ def test_generate_query_params(test_openapi_operation, expected_result):
     assert generate_query_params(test_openapi_operation) == expected_result
 
 
+@pytest.mark.parametrize(
+    "test_openapi_operation, expected_result",
+    [
+        (Operation(parameters=None, requestBody=None), []),
+        (
+            Operation(
+                parameters=[
+                    Parameter(
+                        name="X-Request-Id",
+                        param_in="header",
+                        param_schema=Schema(type="string"),
+                        required=True,
+                    ),
+                    Parameter(
+                        name="test",
+                        param_in="query",
+                        param_schema=Schema(type="string"),
+                        required=True,
+                    ),
+                ],
+            ),
+            ["'X-Request-Id' : X_Request_Id"],
+        ),
+    ],
+)
+def test_generate_header_params(test_openapi_operation, expected_result):
+    assert generate_header_params(test_openapi_operation) == expected_result
+
+
+def test_generate_query_and_header_params_ignore_request_body():
+    operation = Operation(
+        parameters=[
+            Parameter(name="q", param_in="query", param_schema=Schema(type="string")),
+            Parameter(
+                name="X-Trace", param_in="header", param_schema=Schema(type="string")
+            ),
+        ],
+        requestBody=RequestBody(
+            content={"application/xml": MediaType(media_type_schema=Schema())}
+        ),
+    )
+
+    with pytest.raises(Exception, match="Unsupported request body type"):
+        generate_params(operation)
+
+    assert generate_query_params(operation) == ["'q' : q"]
+    assert generate_header_params(operation) == ["'X-Trace' : X_Trace"]
+
+
 @pytest.mark.parametrize(
     "test_openapi_operation, expected_result",
     [
@@ -443,6 +500,46 @@ def test_generate_query_params(test_openapi_operation, expected_result):
                 complex_type=False,
             ),
         ),
+        (
+            Operation(
+                responses={
+                    "404": Response(
+                        description="",
+                        content={
+                            "application/json": MediaType(
+                                media_type_schema=Reference(
+                                    ref="#/components/schemas/Error"
+                                )
+                            )
+                        },
+                    ),
+                    "201": Response(
+                        description="",
+                        content={
+                            "application/json": MediaType(
+                                media_type_schema=Schema(type="string")
+                            )
+                        },
+                    ),
+                }
+            ),
+            OpReturnType(
+                type=TypeConversion(
+                    original_type="string", converted_type="str", import_types=None
+                ),
+                status_code="201",
+                complex_type=False,
+            ),
+        ),
+        (
+            Operation(
+                responses={
+                    "400": Response(description=""),
+                    "500": Response(description=""),
+                }
+            ),
+            OpReturnType(type=None, status_code="200", complex_type=False),
+        ),
     ],
 )
 def test_generate_return_type(test_openapi_operation, expected_result):
@@ -461,3 +558,73 @@ def test_generate_services(model_data):
 
     for i in result:
         compile(i.content, "<string>", "exec")
+
+
+def test_generate_services_validate_syntax(model_data, monkeypatch):
+    parsed = []
+    monkeypatch.setattr(service_generator, "ast", SimpleNamespace(parse=parsed.append))
+    monkeypatch.setattr(common, "_validate_syntax", None)
+    monkeypatch.delenv("OPENAPI_GEN_VALIDATE", raising=False)
+
+    generate_services(model_data.paths, library_config_dict[HTTPLibrary.httpx])
+    assert parsed == []
+
+    monkeypatch.setenv("OPENAPI_GEN_VALIDATE", "1")
+    result = generate_services(model_data.paths, library_config_dict[HTTPLibrary.httpx])
+    assert sorted(parsed) == sorted(so.content for i in result for so in i.operations)
+
+
+def test_set_validate_syntax_overrides_env(monkeypatch):
+    monkeypatch.setattr(common, "_validate_syntax", None)
+    monkeypatch.setenv("OPENAPI_GEN_VALIDATE", "1")
+
+    common.set_validate_syntax(False)
+    assert common.get_validate_syntax() is False
+
+    common.set_validate_syntax(None)
+    assert common.get_validate_syntax() is True
+
+
+def test_generate_services_validate_syntax_error(model_data, monkeypatch, capsys):
+    def _raise_syntax_error(source):
+        raise SyntaxError("invalid syntax")
+
+    monkeypatch.setattr(
+        service_generator, "ast", SimpleNamespace(parse=_raise_syntax_error)
+    )
+    monkeypatch.setattr(common, "_validate_syntax", True)
+
+    generate_services(model_data.paths, library_config_dict[HTTPLibrary.httpx])
+
+    assert "Error in service root__get: invalid syntax" in capsys.readouterr().out
+
+
+def test_generate_services_skips_unset_operations():
+    def _operation(operation_id):
+        return Operation(
+            operationId=operation_id,
+            tags=["items"],
+            responses={"200": Response(description="OK")},
+        )
+
+    paths = {
+        # head is set explicitly to None, get isn't set at all.
+        "/items": PathItem(post=_operation("create_item"), head=None),
+        # Set out of HTTP_OPERATIONS order, output must still follow it.
+        "/items/{id}": PathItem(
+            delete=_operation("delete_item"),
+            put=_operation("update_item"),
+            get=_operation("get_item"),
+        ),
+    }
+    assert "get" not in paths["/items"].__fields_set__
+
+    result = generate_services(paths, library_config_dict[HTTPLibrary.requests])
+
+    assert [i.file_name for i in result] == ["items_service"]
+    assert [(so.path_name, so.method) for so in result[0].operations] == [
+        ("/items", "post"),
+        ("/items/{id}", "get"),
+        ("/items/{id}", "put"),
+        ("/items/{id}", "delete"),
+    ]